@@ -1,91 +1,579 @@
 import argparse
+import configparser
+import functools
+import io
 import logging
 import os
+import re
+import signal
 import sys
+import tempfile
+import threading
 import time
 
 try:
-    import psutil
+    import orjson as json  # Considerably faster at parsing Firefox's extensions.json
 except ImportError:
-    print("Error: psutil is not installed. Please install it using 'pip install psutil'")
-    sys.exit(1)
+    import json
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    from watchdog.observers.polling import PollingObserver
+except ImportError:
+    # watchdog is optional; without it main() falls back to the polling loop.
+    FileSystemEventHandler = object
+    Observer = PollingObserver = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Define browser extension directories (platform-specific)
-CHROME_EXTENSIONS_DIR_WINDOWS = os.path.join(os.environ['LOCALAPPDATA'], 'Google', 'Chrome', 'User Data', 'Default', 'Extensions')
-CHROME_EXTENSIONS_DIR_LINUX = os.path.expanduser("~/.config/google-chrome/Default/Extensions")
-CHROME_EXTENSIONS_DIR_MAC = os.path.expanduser("~/Library/Application Support/Google/Chrome/Default/Extensions")
+# Filesystem types on which kernel change notifications are unreliable or unsupported.
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'afs', '9p', 'sshfs', 'fuse.sshfs'}
 
+# Profile directory suffixes of the Firefox release channels, used when profiles.ini can't be read.
+FIREFOX_PROFILE_SUFFIXES = ('.default-release', '.default-esr', '.dev-edition-default', '.default')
 
-FIREFOX_EXTENSIONS_DIR_WINDOWS = os.path.join(os.environ['APPDATA'], 'Mozilla', 'Firefox', 'Profiles') # requires profile parsing
-FIREFOX_EXTENSIONS_DIR_LINUX = os.path.expanduser("~/.mozilla/firefox")  #requires profile parsing
-FIREFOX_EXTENSIONS_DIR_MAC = os.path.expanduser("~/Library/Application Support/Firefox/Profiles") # requires profile parsing
+# Quiet period (in seconds) after the last filesystem event before rescanning, so that bursts of events
+# from a browser updating several extensions at once are reported as a single change.
+DEBOUNCE_SECONDS = 0.5
+
+# Scans of files and directories modified this recently (in nanoseconds) aren't cached: on filesystems with coarse
+# timestamps (FAT, HFS+, many network mounts) a later change could land in the same mtime tick and go unnoticed.
+RACY_MTIME_WINDOW_NS = 2_000_000_000
 
 
 
 def setup_argparse():
     """Sets up the command line argument parser."""
     parser = argparse.ArgumentParser(description='Monitor browser extensions for changes.')
-    parser.add_argument('--browser', type=str, choices=['chrome', 'firefox'],
-                        help='The browser to monitor (chrome or firefox).', required=False)
+    parser.add_argument('--browser', type=str, choices=['chrome', 'firefox'], nargs='+',
+                        help='The browser(s) to monitor (chrome and/or firefox).', required=False)
     parser.add_argument('--interval', type=int, default=60,
                         help='The interval (in seconds) between checks.', required=False)
     parser.add_argument('--report', type=str,
                         help='File to save extension change reports.', required=False)
     parser.add_argument('--alert-on-change', action='store_true', help='Alert and log on extension change')
     parser.add_argument('--extensions_dir', type=str, help='Specify the extensions directory', required=False)
+    parser.add_argument('--state-file', type=str,
+                        help='File to persist the known extensions between runs.', required=False)
     return parser.parse_args()
 
+def is_racy(st):
+    """Checks whether st's mtime is too recent for a cache keyed on it to be trusted (the "racy git" rule)."""
+    return time.time_ns() - st.st_mtime_ns < RACY_MTIME_WINDOW_NS
+
+
+def cache_by_dir_mtime(get_extensions):
+    """
+    Wraps an extensions getter so it skips the directory listing when extensions_dir is unchanged.
+    The cache dict maps extensions_dir to (st_mtime_ns, st_ino, extensions) from the last scan. Cached
+    extensions are a frozenset, so callers get the very same object back while nothing changes.
+    """
+    @functools.wraps(get_extensions)
+    def wrapper(extensions_dir, cache=None):
+        if cache is None:
+            return get_extensions(extensions_dir)
+        try:
+            st = os.stat(extensions_dir)
+        except OSError:
+            return get_extensions(extensions_dir)  # Let the getter report the missing/inaccessible directory
+
+        cached = cache.get(extensions_dir)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_ino):
+            return cached[2]
+
+        extensions = frozenset(get_extensions(extensions_dir))
+        if is_racy(st):
+            cache.pop(extensions_dir, None)  # Rescan next time, the directory may change again within this mtime tick
+        else:
+            cache[extensions_dir] = (st.st_mtime_ns, st.st_ino, extensions)
+        return extensions
+    return wrapper
+
+@cache_by_dir_mtime
 def get_chrome_extensions(extensions_dir):
     """Gets a list of Chrome extensions by listing directories in the extensions directory."""
     try:
-        if not os.path.exists(extensions_dir):
-             logging.warning(f"Chrome extensions directory not found: {extensions_dir}")
-             return []
-
-        extensions = [d for d in os.listdir(extensions_dir) if os.path.isdir(os.path.join(extensions_dir, d))]
-        logging.debug(f"Found chrome extensions: {extensions}")
+        with os.scandir(extensions_dir) as entries:
+            # Interned so repeated scans share one string per extension ID and set comparisons hit the identity check.
+            extensions = [sys.intern(entry.name) for entry in entries if entry.is_dir(follow_symlinks=False)]
+        logging.debug("Found chrome extensions: %s", extensions)
         return extensions
+    except FileNotFoundError:
+        logging.warning(f"Chrome extensions directory not found: {extensions_dir}")
+        return []
     except OSError as e:
         logging.error(f"Error accessing Chrome extensions directory: {e}")
         return []
 
 
-def get_firefox_extensions(extensions_dir):
+def parse_extensions_json(extensions_json):
+    """Returns the IDs of the active add-ons listed in a Firefox extensions.json file."""
+    with open(extensions_json, "rb") as file:
+        data = json.loads(file.read())
+    addons = data.get('addons', []) if isinstance(data, dict) else []
+    if not isinstance(addons, list):
+        return []
+    return [sys.intern(addon['id']) for addon in addons
+            if isinstance(addon, dict) and addon.get('active') and isinstance(addon.get('id'), str)]
+
+
+def parse_profiles_ini(profiles_ini):
     """
-    Gets the installed extensions from Firefox profile directories.
-    Note: This is a simplified implementation and needs more robust profile parsing for real-world scenarios.
+    Returns the paths of the default profiles listed in a Firefox profiles.ini file.
+    Per-installation defaults ([Install*] sections) win over the legacy Default=1 profile flag.
     """
-    try:
-        if not os.path.exists(extensions_dir):
-            logging.warning(f"Firefox profiles directory not found: {extensions_dir}")
-            return []
+    parser = configparser.ConfigParser(interpolation=None)
+    with open(profiles_ini, "r", encoding="utf-8") as file:
+        parser.read_file(file)
+
+    base_dir = os.path.dirname(profiles_ini)
+    profiles = {}  # Path as written in profiles.ini -> resolved path
+    legacy_defaults = []
+    for section in parser.sections():
+        if section.startswith("Profile") and parser.has_option(section, "Path"):
+            path = parser.get(section, "Path")
+            is_relative = parser.get(section, "IsRelative", fallback="1") == "1"
+            profiles[path] = os.path.normpath(os.path.join(base_dir, path) if is_relative else path)
+            if parser.get(section, "Default", fallback="0") == "1":
+                legacy_defaults.append(profiles[path])
+
+    install_defaults = [parser.get(section, "Default") for section in parser.sections()
+                        if section.startswith("Install") and parser.has_option(section, "Default")]
+    if install_defaults:
+        return list(dict.fromkeys(profiles.get(path, os.path.normpath(os.path.join(base_dir, path)))
+                                  for path in install_defaults))
+    return legacy_defaults
+
+
+def find_profiles_ini(extensions_dir):
+    """
+    Locates Firefox's profiles.ini: next to the profiles on Linux, one level above them on Windows and macOS.
+    Returns (path, os.stat_result), or (None, None) if there is none.
+    """
+    for profiles_ini in (os.path.join(extensions_dir, "profiles.ini"),
+                         os.path.join(os.path.dirname(os.path.normpath(extensions_dir)), "profiles.ini")):
+        try:
+            return profiles_ini, os.stat(profiles_ini)
+        except OSError:
+            continue
+    return None, None
 
-        extensions = []
-        for item in os.listdir(extensions_dir):
-            profile_path = os.path.join(extensions_dir, item)
-            if os.path.isdir(profile_path) and item.endswith(".default-release"): #Basic filter
-                extensions_json = os.path.join(profile_path, "extensions.json") #Attempt to read extensions file, needs more sophisticated parsing
 
-                if os.path.exists(extensions_json): #Check if extensions.json exists before opening
-                    try:
-                        with open(extensions_json, "r") as file:
-                            extensions_data = file.read() # Read the file, needs more sophisticated parsing such as json.load
-                            logging.debug(f"Found extensions file in profile: {item}")
-                            extensions.append(item) # Add the profile directory containing extensions.json as an extension
-                    except (FileNotFoundError, IOError) as e:
-                        logging.error(f"Error reading extensions.json: {e}")
-
-        logging.debug(f"Found Firefox profiles with extensions: {extensions}")
+def find_firefox_profiles(extensions_dir, cache=None):
+    """
+    Gets the Firefox profile directories to monitor.
+    The default profiles from profiles.ini are preferred; without it, profile directories are matched by their
+    release channel suffix. Parsed profiles.ini files are cached like extensions.json, by
+    (st_ino, st_mtime_ns, st_size).
+    """
+    profiles_ini, st = find_profiles_ini(extensions_dir)
+    if profiles_ini is not None:
+        cached = cache.get(profiles_ini) if cache is not None else None
+        if cached is not None and cached[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+            profiles = cached[3]
+        else:
+            try:
+                profiles = parse_profiles_ini(profiles_ini)
+                if cache is not None and not is_racy(st):
+                    cache[profiles_ini] = (st.st_ino, st.st_mtime_ns, st.st_size, profiles)
+            except (IOError, ValueError, configparser.Error) as e:  # ValueError covers invalid UTF-8
+                logging.warning(f"Error reading {profiles_ini}, falling back to profile name matching: {e}")
+                profiles = []
+        if profiles:
+            return profiles
+
+    # Filter on the name first so only candidate profiles ever need an is_dir() check.
+    with os.scandir(extensions_dir) as entries:
+        candidates = [entry for entry in entries if entry.name.endswith(FIREFOX_PROFILE_SUFFIXES)]
+    return [profile.path for profile in candidates if profile.is_dir(follow_symlinks=False)]
+
+
+def get_firefox_extensions(extensions_dir, cache=None):
+    """
+    Gets the IDs of the active extensions from the extensions.json of the Firefox profiles found by
+    find_firefox_profiles.
+    The cache dict maps each extensions.json path to (st_ino, st_mtime_ns, st_size, extension_ids), so
+    unchanged files aren't reopened and reparsed.
+    """
+    try:
+        extensions = []
+        for profile_path in find_firefox_profiles(extensions_dir, cache):
+            extensions_json = os.path.join(profile_path, "extensions.json")
+            try:
+                st = os.stat(extensions_json)
+            except FileNotFoundError:
+                continue
+
+            cached = cache.get(extensions_json) if cache is not None else None
+            if cached is not None and cached[:3] == (st.st_ino, st.st_mtime_ns, st.st_size):
+                extensions.extend(cached[3])
+                continue
+
+            try:
+                profile_extensions = parse_extensions_json(extensions_json)
+                logging.debug("Found %d active extensions in profile: %s", len(profile_extensions), os.path.basename(profile_path))
+                extensions.extend(profile_extensions)
+                if cache is not None and not is_racy(st):
+                    cache[extensions_json] = (st.st_ino, st.st_mtime_ns, st.st_size, profile_extensions)
+            except (FileNotFoundError, IOError) as e:
+                logging.error(f"Error reading extensions.json: {e}")
+            except ValueError as e:
+                logging.error(f"Error parsing extensions.json: {e}")
+
+        logging.debug("Found Firefox extensions: %s", extensions)
         return extensions
+    except FileNotFoundError:
+        logging.warning(f"Firefox profiles directory not found: {extensions_dir}")
+        return []
     except OSError as e:
         logging.error(f"Error accessing Firefox profiles directory: {e}")
         return []
 
 
 
+def _windows_dir(env_var, fallback, *parts):
+    base = os.environ.get(env_var) or os.path.expanduser(os.path.join('~', *fallback))
+    return os.path.join(base, *parts)
+
+
+# Linux and other Unix-likes share the same home-relative layout.
+PLATFORM = sys.platform if sys.platform in ('win32', 'darwin') else 'linux'
+
+# (browser, platform) -> (default extensions directory factory, extensions getter).
+# Directories are factories so the environment is only consulted for the platform actually in use.
+DISPATCH = {
+    ('chrome', 'win32'): (lambda: _windows_dir('LOCALAPPDATA', ('AppData', 'Local'), 'Google', 'Chrome', 'User Data', 'Default', 'Extensions'),
+                          get_chrome_extensions),
+    ('chrome', 'darwin'): (lambda: os.path.expanduser("~/Library/Application Support/Google/Chrome/Default/Extensions"),
+                           get_chrome_extensions),
+    ('chrome', 'linux'): (lambda: os.path.expanduser("~/.config/google-chrome/Default/Extensions"),
+                          get_chrome_extensions),
+    ('firefox', 'win32'): (lambda: _windows_dir('APPDATA', ('AppData', 'Roaming'), 'Mozilla', 'Firefox', 'Profiles'),
+                           get_firefox_extensions),
+    ('firefox', 'darwin'): (lambda: os.path.expanduser("~/Library/Application Support/Firefox/Profiles"),
+                            get_firefox_extensions),
+    ('firefox', 'linux'): (lambda: os.path.expanduser("~/.mozilla/firefox"),
+                           get_firefox_extensions),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_extensions_dir(browser):
+    """Returns the platform's default extensions directory for browser, resolved on first use."""
+    resolve_dir, _ = DISPATCH[(browser, PLATFORM)]
+    return resolve_dir()
+
+
+
+def escape_state_line(extension):
+    """Escapes backslashes and newlines so that every extension fits on one line of the state file."""
+    return extension.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def unescape_state_line(line):
+    """Reverses escape_state_line."""
+    return re.sub(r"\\(.)", lambda match: "\n" if match.group(1) == "n" else match.group(1), line)
+
+
+class ExtensionMonitor:
+    """Tracks the extensions of a single browser and reports changes against the last known set."""
+
+    def __init__(self, browser, extensions_dir, get_extensions, report=None, alert_on_change=False, state_file=None):
+        self.browser = browser
+        self.extensions_dir = extensions_dir
+        self.get_extensions = get_extensions
+        self.report = report  # Shared line-buffered report file handle, opened once by main()
+        self.alert_on_change = alert_on_change
+        self.state_file = state_file
+        self.scan_cache = {}  # Persists across checks so unchanged directories aren't relisted
+
+        self.previous_extensions = self.load_state()
+        if self.previous_extensions is None:
+            self.previous_extensions = frozenset(get_extensions(extensions_dir, self.scan_cache))
+            self.save_state()
+        self.previous_hash = hash(self.previous_extensions)
+
+    def load_state(self):
+        """
+        Loads the known extensions from the state file.
+        Returns None if there is no state file or it is older than the extensions directory.
+        """
+        if not self.state_file:
+            return None
+        try:
+            if os.stat(self.state_file).st_mtime_ns < os.stat(self.extensions_dir).st_mtime_ns:
+                logging.info(f"State file {self.state_file} is out of date, rescanning {self.extensions_dir}.")
+                return None
+            # surrogateescape round-trips directory names that aren't valid UTF-8, as os.scandir reports them.
+            with open(self.state_file, 'r', encoding='utf-8', errors='surrogateescape', newline='') as f:
+                data = f.read()
+            return frozenset(sys.intern(unescape_state_line(line)) for line in data.split("\n") if line)
+        except (OSError, ValueError):
+            return None
+
+    def save_state(self):
+        """Atomically replaces the state file with the known extensions, one (escaped) per line."""
+        if not self.state_file:
+            return
+        state_path = os.path.abspath(self.state_file)
+        data = "\n".join(map(escape_state_line, sorted(self.previous_extensions))).encode('utf-8', 'surrogateescape')
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(state_path), prefix=f".{os.path.basename(state_path)}.")
+        except OSError as e:
+            logging.error(f"Error creating state file: {e}")
+            return
+
+        try:
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, state_path)  # Atomic, and unlike os.rename overwrites on Windows too
+        except OSError as e:
+            logging.error(f"Error writing state file: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    # Checks run from the main loop and the event handlers' worker threads, and share the report file.
+    check_lock = threading.Lock()
+
+    def check(self):
+        """Rescans the extensions directory and logs, alerts and reports any changes."""
+        with self.check_lock:
+            # frozenset() hands back a cached frozenset unchanged, so an unchanged directory is usually caught by
+            # the identity test; otherwise length and hash are compared before any set difference is built.
+            current_extensions = frozenset(self.get_extensions(self.extensions_dir, self.scan_cache))
+            if current_extensions is self.previous_extensions:
+                return
+            if (len(current_extensions) == len(self.previous_extensions)
+                    and hash(current_extensions) == self.previous_hash
+                    and current_extensions == self.previous_extensions):
+                self.previous_extensions = current_extensions  # Keep the cached object for the identity test
+                return
+
+            added_extensions = set(current_extensions - self.previous_extensions)
+            removed_extensions = set(self.previous_extensions - current_extensions)
+
+            if added_extensions or removed_extensions:
+                logging.info(f"{self.browser} extension changes detected!")
+
+                if added_extensions:
+                    logging.info(f"Added extensions: {added_extensions}")
+                if removed_extensions:
+                    logging.info(f"Removed extensions: {removed_extensions}")
+
+                if self.alert_on_change:
+                    # Built up front so both alert lines reach stdout in a single write.
+                    alert = io.StringIO()
+                    if added_extensions:
+                        alert.write(f"Alert: Added extensions: {added_extensions}\n")
+                    if removed_extensions:
+                        alert.write(f"Alert: Removed extensions: {removed_extensions}\n")
+                    sys.stdout.write(alert.getvalue())
+                    sys.stdout.flush()
+
+
+                if self.report:
+                    try:
+                        record = f"{time.strftime('%Y-%m-%d %H:%M:%S')}: {self.browser} extension changes detected:\n"
+                        if added_extensions:
+                            record += f"  Added: {added_extensions}\n"
+                        if removed_extensions:
+                            record += f"  Removed: {removed_extensions}\n"
+                        self.report.write(record + "\n")
+                        logging.info(f"Extension changes written to report file: {self.report.name}")
+                    except IOError as e:
+                        logging.error(f"Error writing to report file: {e}")
+
+                self.previous_extensions = current_extensions
+                self.previous_hash = hash(current_extensions)
+                self.save_state()
+
+
+class ExtensionEventHandler(FileSystemEventHandler):
+    """
+    Rescans the monitored directory when one of its extension (or profile) directories is created, deleted
+    or moved, or when Firefox's profiles.ini or a profile's extensions.json is rewritten.
+    """
+
+    def __init__(self, monitor, observer, debounce=DEBOUNCE_SECONDS):
+        super().__init__()
+        self.monitor = monitor
+        self.observer = observer
+        self.watch_dir = os.path.abspath(monitor.extensions_dir)
+        self.profile_dirs = set()
+        self.watches = {}  # Watched directory -> (watchdog ObservedWatch, st_ino of the directory when scheduled)
+        self.watch_lock = threading.Lock()  # refresh_watches runs from both the main loop and the worker
+        self.debounce = debounce
+        self.deadline = None  # time.monotonic() at which the pending check runs, None when nothing is pending
+        self.closed = False
+        self.condition = threading.Condition()
+        self.worker = threading.Thread(target=self._run_checks, daemon=True)
+        self.worker.start()
+
+    def refresh_watches(self):
+        """
+        Watches the extensions directory and, for Firefox, each profile directory. The watches are not recursive,
+        so churn in profile storage, caches and databases never reaches the observer. Watches on directories that
+        were deleted (or replaced by a new directory of the same name) are dropped and, if possible, rescheduled.
+        """
+        with self.watch_lock:
+            self._refresh_watches()
+
+    def _refresh_watches(self):
+        wanted = {self.watch_dir}
+        if self.monitor.browser == 'firefox':
+            try:
+                self.profile_dirs = {os.path.abspath(path) for path in
+                                     find_firefox_profiles(self.monitor.extensions_dir, self.monitor.scan_cache)}
+            except OSError:
+                self.profile_dirs = set()  # The profiles directory is gone; keep watching it for its return
+            wanted |= self.profile_dirs
+
+            # On Windows and macOS profiles.ini sits one level above the profiles directory, so watch that as well.
+            wanted.add(os.path.dirname(self.watch_dir))
+
+        for path, (watch, ino) in list(self.watches.items()):
+            try:
+                st = os.stat(path)
+                stale = st.st_ino != ino
+            except OSError:
+                stale = True
+            if stale or path not in wanted:
+                del self.watches[path]
+                self.observer.unschedule(watch)
+
+        for path in wanted - set(self.watches):
+            try:
+                ino = os.stat(path).st_ino
+                if os.path.isdir(path):
+                    self.watches[path] = (self.observer.schedule(self, path, recursive=False), ino)
+            except OSError as e:
+                if os.path.exists(path):
+                    logging.error(f"Error watching {path}: {e}")
+
+    def is_watching(self):
+        """Checks whether the extensions directory itself is currently being watched."""
+        with self.watch_lock:
+            return self.watch_dir in self.watches
+
+    def _is_relevant(self, path, is_directory):
+        if path == self.watch_dir:
+            return True  # The extensions directory itself was deleted, moved or (re)created
+        if is_directory:
+            return os.path.dirname(path) == self.watch_dir
+        if os.path.basename(path) == "profiles.ini":
+            return os.path.dirname(path) in (self.watch_dir, os.path.dirname(self.watch_dir))
+        return os.path.basename(path) == "extensions.json" and os.path.dirname(path) in self.profile_dirs
+
+    def check(self):
+        """Checks the monitor, then follows any profiles that were added or removed."""
+        self.monitor.check()
+        self.refresh_watches()
+
+    def schedule_check(self):
+        """Pushes the pending check back by the debounce delay so that a burst of events results in a single check."""
+        with self.condition:
+            self.deadline = time.monotonic() + self.debounce
+            self.condition.notify()
+
+    def _run_checks(self):
+        """Worker thread: runs a check once the events have been quiet for the debounce delay."""
+        while True:
+            with self.condition:
+                while not self.closed and (self.deadline is None or self.deadline > time.monotonic()):
+                    self.condition.wait(None if self.deadline is None else self.deadline - time.monotonic())
+                if self.closed:
+                    return
+                self.deadline = None
+            try:
+                self.check()
+            except Exception:
+                # Keep the worker alive; otherwise events would keep arriving with nothing left to check them.
+                logging.exception(f"Error checking {self.monitor.browser} extensions")
+
+    def close(self):
+        """Stops the worker, waiting for a check in progress, and then runs any check that is still pending."""
+        with self.condition:
+            self.closed = True
+            pending = self.deadline is not None
+            self.deadline = None
+            self.condition.notify()
+        self.worker.join()
+        if pending:
+            try:
+                self.monitor.check()
+            except Exception:
+                logging.exception(f"Error checking {self.monitor.browser} extensions")
+
+    def on_created(self, event):
+        if self._is_relevant(event.src_path, event.is_directory):
+            self.schedule_check()
+
+    def on_deleted(self, event):
+        if self._is_relevant(event.src_path, event.is_directory):
+            self.schedule_check()
+
+    def on_modified(self, event):
+        if not event.is_directory and self._is_relevant(event.src_path, False):
+            self.schedule_check()
+
+    def on_moved(self, event):
+        if self._is_relevant(event.src_path, event.is_directory) or self._is_relevant(event.dest_path, event.is_directory):
+            self.schedule_check()
+
+
+def is_network_filesystem(path):
+    """Checks whether path lives on a network filesystem, where kernel change notifications don't fire."""
+    path = os.path.realpath(path)
+    if os.name == 'nt':
+        return path.startswith('\\\\')  # UNC share
+
+    try:
+        with open('/proc/mounts', 'r') as mounts:
+            best_match, fs_type = '', None
+            for line in mounts:
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                mount_point = fields[1].replace('\\040', ' ')
+                if (path == mount_point or path.startswith(mount_point.rstrip('/') + '/')) and len(mount_point) > len(best_match):
+                    best_match, fs_type = mount_point, fields[2]
+    except OSError:
+        return False  # No /proc/mounts (e.g. macOS); assume a local filesystem
+
+    return fs_type in NETWORK_FILESYSTEMS
+
+
+def create_observer(extensions_dirs, interval):
+    """
+    Picks a single watchdog observer able to watch all of extensions_dirs.
+    Returns None when watchdog is unavailable or none of the directories exist yet, in which case main() polls.
+    """
+    existing_dirs = [d for d in extensions_dirs if os.path.isdir(d)]
+    if Observer is None or not existing_dirs:
+        return None
+    for extensions_dir in existing_dirs:
+        if is_network_filesystem(extensions_dir):
+            logging.info(f"{extensions_dir} is on a network filesystem, polling every {interval} seconds.")
+            return PollingObserver(timeout=interval)
+    return Observer()
+
+
+def browser_state_file(state_file, browser, browsers):
+    """Derives a per-browser state file (e.g. state.chrome.txt) when several browsers share --state-file."""
+    if not state_file or len(browsers) == 1:
+        return state_file
+    root, ext = os.path.splitext(state_file)
+    return f"{root}.{browser}{ext}"
+
+
+
 def main():
     """Main function to monitor browser extensions."""
     args = setup_argparse()
@@ -98,92 +586,87 @@ def main():
          logging.warning("Report file should end with .txt extension")
 
 
-    browser = args.browser
+    browsers = list(dict.fromkeys(args.browser or []))  # Drop duplicates, keep order
     interval = args.interval
     report_file = args.report
     alert_on_change = args.alert_on_change
+    state_file = args.state_file
 
-    if args.extensions_dir:
-        extensions_dir = args.extensions_dir
-    else:
-        if browser == 'chrome':
-            if os.name == 'nt':
-                extensions_dir = CHROME_EXTENSIONS_DIR_WINDOWS
-            elif os.name == 'posix':
-                extensions_dir = CHROME_EXTENSIONS_DIR_LINUX
-            elif os.name == 'darwin':
-                extensions_dir = CHROME_EXTENSIONS_DIR_MAC
-            else:
-                logging.error("Unsupported OS. Please specify the extensions directory using --extensions_dir.")
-                sys.exit(1)
-
-        elif browser == 'firefox':
-            if os.name == 'nt':
-                extensions_dir = FIREFOX_EXTENSIONS_DIR_WINDOWS
-            elif os.name == 'posix':
-                extensions_dir = FIREFOX_EXTENSIONS_DIR_LINUX
-            elif os.name == 'darwin':
-                extensions_dir = FIREFOX_EXTENSIONS_DIR_MAC
-            else:
-                logging.error("Unsupported OS. Please specify the extensions directory using --extensions_dir.")
-                sys.exit(1)
+    if not browsers:
+        if args.extensions_dir:
+            logging.error("Invalid browser specified.")
         else:
             logging.error("Please specify a browser (--browser) or extensions directory (--extensions_dir).")
-            sys.exit(1)
-
-    if browser == 'chrome':
-        get_extensions = get_chrome_extensions
-    elif browser == 'firefox':
-        get_extensions = get_firefox_extensions
-    else:
-        logging.error("Invalid browser specified.")
+        sys.exit(1)
+    if args.extensions_dir and len(browsers) > 1:
+        logging.error("--extensions_dir can only be used when monitoring a single browser.")
         sys.exit(1)
 
-
-    previous_extensions = set(get_extensions(extensions_dir))
-
-    logging.info(f"Monitoring {browser} extensions directory: {extensions_dir} every {interval} seconds.")
+    report = None
+    if report_file:
+        try:
+            # Line buffered: every record reaches the file as soon as it is written, without reopening it.
+            report = open(report_file, 'a', buffering=1)
+        except IOError as e:
+            logging.error(f"Error opening report file: {e}")
+
+    monitors = []
+    for browser in browsers:
+        _, get_extensions = DISPATCH[(browser, PLATFORM)]
+        extensions_dir = args.extensions_dir or _resolve_extensions_dir(browser)
+
+        monitors.append(ExtensionMonitor(browser, extensions_dir, get_extensions, report, alert_on_change,
+                                         browser_state_file(state_file, browser, browsers)))
+        logging.info(f"Monitoring {browser} extensions directory: {extensions_dir} every {interval} seconds.")
+
+    # SIGINT/SIGTERM wake the main loop immediately instead of after the current interval.
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    # One observer multiplexes every watched directory; directories that can't be watched (yet) are polled.
+    observer = create_observer([monitor.extensions_dir for monitor in monitors], interval)
+    polled_monitors = monitors
+    handlers = []
 
     try:
-        while True:
-            current_extensions = set(get_extensions(extensions_dir))
-
-            added_extensions = current_extensions - previous_extensions
-            removed_extensions = previous_extensions - current_extensions
-
-            if added_extensions or removed_extensions:
-                logging.info("Extension changes detected!")
-
-                if added_extensions:
-                    logging.info(f"Added extensions: {added_extensions}")
-                if removed_extensions:
-                    logging.info(f"Removed extensions: {removed_extensions}")
-
-                if alert_on_change:
-                    if added_extensions:
-                        print(f"Alert: Added extensions: {added_extensions}")
-                    if removed_extensions:
-                        print(f"Alert: Removed extensions: {removed_extensions}")
-
-
-                if report_file:
-                    try:
-                        with open(report_file, 'a') as f:
-                            f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}: Extension changes detected:\n")
-                            if added_extensions:
-                                f.write(f"  Added: {added_extensions}\n")
-                            if removed_extensions:
-                                f.write(f"  Removed: {removed_extensions}\n")
-                            f.write("\n")
-                        logging.info(f"Extension changes written to report file: {report_file}")
-                    except IOError as e:
-                        logging.error(f"Error writing to report file: {e}")
-
-            previous_extensions = current_extensions
-            time.sleep(interval)
-
-    except KeyboardInterrupt:
+        try:
+            if observer is not None:
+                handlers = [ExtensionEventHandler(monitor, observer) for monitor in monitors]
+                for handler in handlers:
+                    handler.refresh_watches()
+                try:
+                    observer.start()
+                    polled_monitors = []
+                except OSError as e:
+                    # Typically the inotify watch limit (fs.inotify.max_user_watches) being reached.
+                    logging.warning(f"Could not start watching for changes, polling every {interval} seconds instead: {e}")
+                    observer.unschedule_all()
+                    for handler in handlers:
+                        handler.close()
+                    observer, handlers = None, []
+
+            while observer is None or observer.is_alive():
+                if stop.wait(interval):
+                    break
+                for monitor in polled_monitors:
+                    monitor.check()
+                for handler in handlers:
+                    if not handler.is_watching():
+                        # The extensions directory is missing (or was replaced): watch it again once it exists, and
+                        # poll meanwhile. Checking after the watch is back catches anything created before it.
+                        handler.refresh_watches()
+                        handler.monitor.check()
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            for handler in handlers:
+                handler.close()  # Finishes running checks and reports changes still waiting out the debounce window
+            if report is not None:
+                report.close()
         logging.info("Monitoring stopped.")
+
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
 
@@ -194,6 +677,8 @@ if __name__ == "__main__":
     #    python main.py --browser chrome --interval 60 --report chrome_report.txt
     # 2. Monitor Firefox extensions and alert on any changes.
     #    python main.py --browser firefox --alert-on-change
-    # 3. Monitor Chrome extensions with a specific extensions directory:
+    # 3. Monitor Chrome and Firefox extensions from a single process:
+    #    python main.py --browser chrome firefox --report browsers_report.txt
+    # 4. Monitor Chrome extensions with a specific extensions directory:
     #    python main.py --browser chrome --extensions_dir "/path/to/chrome/extensions"
     main()
\ No newline at end of file